@@ -2,18 +2,57 @@
 
 import os
 import sys
-import shutil
-import subprocess
-import argparse
 import json
-from pathlib import Path
-from urllib.parse import urlparse
-from typing import Optional, Set
+import functools
+from collections import deque
+from types import SimpleNamespace
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+# Command line defaults, shared by argparse and the bare-URL fast path
+DEFAULT_ARGS = {
+    "config": "config.json",
+    "branch": None,
+    "depth": 1,
+    "output": None,
+    "exclude": [],
+    "max_file_size": None,
+    "stats": False,
+    "include_binary": False,
+    "only": None,
+    "io_backend": "threads",
+}
+
+# Separator lines around each file's path in the output
+FILE_HEADER_START = b"\n" + b"=" * 60 + b"\nFILE: "
+FILE_HEADER_END = b"\n" + b"=" * 60 + b"\n"
+# Bytes sniffed from the start of each file to detect binary content
+SNIFF_SIZE = 8192
+# Chunk size used when streaming file contents into the output
+COPY_BUFFER_SIZE = 1 << 20
+# Output buffer so many small files are written with few syscalls
+OUTPUT_BUFFER_SIZE = 1 << 20
+# Headers and small file contents are batched up to this size per write
+WRITE_BATCH_SIZE = 4 << 20
+# Files at least this big are copied in kernel space with os.sendfile
+KERNEL_COPY_MIN_SIZE = 64 * 1024
+# Threads reading files ahead of the writer
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+# Reads kept in flight when io_uring is available
+IO_URING_QUEUE_DEPTH = 128
 
 
 class Stats:
+    __slots__ = (
+        'included_files', 'total_size', 'skipped_by_extension', 'skipped_by_folder',
+        'skipped_by_name', 'skipped_by_size', 'skipped_binary'
+    )
+
     def __init__(self):
-        self.total_files = 0
         self.included_files = 0
         self.total_size = 0
         self.skipped_by_extension = 0
@@ -22,6 +61,14 @@ class Stats:
         self.skipped_by_size = 0
         self.skipped_binary = 0
 
+    @property
+    def total_files(self) -> int:
+        # Every file the walk yields ends up in exactly one of these
+        return (
+            self.included_files + self.skipped_by_extension + self.skipped_by_name +
+            self.skipped_by_size + self.skipped_binary
+        )
+
     def print_summary(self):
         print("\n=== Processing Summary ===")
         print(f"Total files found: {self.total_files}")
@@ -29,15 +76,23 @@ class Stats:
         print(f"Total size: {self.total_size / 1024:.1f} KB")
         print(f"Skipped files:")
         print(f"  - By extension: {self.skipped_by_extension}")
-        print(f"  - By folder: {self.skipped_by_folder}")
+        print(f"  - By folder: {self.skipped_by_folder} (whole folders pruned)")
         print(f"  - By name: {self.skipped_by_name}")
         print(f"  - By size: {self.skipped_by_size}")
         print(f"  - Binary files: {self.skipped_binary}")
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_url(url: str):
+    """Parse a URL once for both validation and naming."""
+    from urllib.parse import urlparse
+
+    return urlparse(url)
+
+
 def validate_repo_url(url: str) -> bool:
     """Validate if the URL looks like a git repository."""
-    parsed = urlparse(url)
+    parsed = _parse_url(url)
     return (
             parsed.scheme in ('http', 'https', 'git') and
             parsed.netloc and
@@ -120,29 +175,108 @@ def load_config(config_file: str) -> dict:
 
 def parse_repo_name(repo_url: str) -> str:
     """Derive a repo name from the given URL."""
-    base_path = urlparse(repo_url).path
-    base_name = os.path.basename(base_path)
+    # URL paths always use '/', regardless of the local OS
+    base_name = _parse_url(repo_url).path.rpartition("/")[2]
     if base_name.endswith(".git"):
         base_name = base_name[:-4]
     return base_name or "repository"
 
 
-def clone_repo(repo_url: str, dest_path: str, branch: str) -> None:
-    """Clone specific branch from the GitHub repository."""
+def _escape_glob(text: str) -> str:
+    """Escape wildcards so a config name only matches itself in a pattern."""
+    text = "".join("\\" + c if c in "\\*?[" else c for c in text)
+    # Trailing spaces are dropped from patterns unless escaped
+    stripped = text.rstrip(" ")
+    return stripped + "\\ " * (len(text) - len(stripped))
+
+
+def _case_insensitive_glob(text: str) -> str:
+    """Turn 'py' into '[pP][yY]' since sparse patterns are case-sensitive."""
+    return "".join(
+        f"[{c.lower()}{c.upper()}]" if c.isalpha() else _escape_glob(c) for c in text
+    )
+
+
+def build_sparse_patterns(
+        extensions: Optional[Set[str]] = None,
+        skip_folders: Optional[Set[str]] = None,
+        skip_files: Optional[Set[str]] = None
+) -> List[str]:
+    """Build non-cone sparse-checkout patterns mirroring the file filters.
+
+    Later patterns override earlier ones and a file's own match takes
+    precedence over its parent folders, so every file is decided by name.
+    The patterns may keep more than the walk does, but never less.
+    """
+    patterns = ["*"]
+
+    if extensions:
+        # Exclude everything with an extension. Dotfiles without a further
+        # dot and names ending in a dot have none, like Path.suffix.
+        patterns += ["!*.*", ".*", "!.*.*", "*."]
+        patterns += [f"*{_case_insensitive_glob(ext)}" for ext in sorted(extensions)]
+
+    # The walk compares single names, so entries containing '/' never match
+    for folder in sorted(skip_folders or ()):
+        folder = folder.strip("/")
+        if folder and "/" not in folder:
+            patterns.append(f"!**/{_escape_glob(folder)}/**")
+
+    for file_name in sorted(skip_files or ()):
+        if file_name and "/" not in file_name:
+            patterns.append(f"!**/{_escape_glob(file_name)}")
+
+    return patterns
+
+
+def clone_repo(
+        repo_url: str,
+        dest_path: str,
+        branch: str,
+        depth: int = 1,
+        sparse_patterns: Optional[List[str]] = None
+) -> None:
+    """Shallow clone specific branch, only fetching files that match the filters."""
+    import subprocess
+
     if not validate_repo_url(repo_url):
         print(f"[ERROR] Invalid repository URL: {repo_url}")
         sys.exit(1)
 
     print(f"[INFO] Cloning branch '{branch}' from {repo_url} into {dest_path}...")
+
+    # Only the working tree is needed, so skip history and tags. Blobs are
+    # fetched lazily on checkout, so filtered-out files are never downloaded.
+    cmd = ["git", "-c", "protocol.version=2", "clone"]
+    if depth > 0:
+        cmd.append(f"--depth={depth}")
+    if sparse_patterns:
+        cmd += ["--filter=blob:none", "--no-checkout"]
+    cmd += [
+        "--single-branch",
+        "--no-tags",
+        "--branch", branch,
+        repo_url,
+        dest_path
+    ]
+
+    # Never block waiting for credentials on private or missing repos
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+
     try:
-        subprocess.check_call([
-            "git",
-            "clone",
-            "--single-branch",
-            "--branch", branch,
-            repo_url,
-            dest_path
-        ])
+        subprocess.check_call(cmd, env=env)
+
+        if sparse_patterns:
+            subprocess.check_call(
+                ["git", "-C", dest_path, "config", "core.sparseCheckout", "true"], env=env
+            )
+            sparse_file = os.path.join(dest_path, ".git", "info", "sparse-checkout")
+            os.makedirs(os.path.dirname(sparse_file), exist_ok=True)
+            with open(sparse_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(sparse_patterns) + "\n")
+            subprocess.check_call(
+                ["git", "-C", dest_path, "read-tree", "-mu", "HEAD"], env=env
+            )
     except subprocess.CalledProcessError:
         print(f"[ERROR] Failed to clone branch '{branch}' from repository '{repo_url}'.")
         print("       The branch might not exist, or there was a problem accessing the repo.")
@@ -151,6 +285,8 @@ def clone_repo(repo_url: str, dest_path: str, branch: str) -> None:
 
 def remove_unwanted_folders(root_path: str, folders_to_remove: Set[str]) -> None:
     """Remove unwanted folders efficiently using sets."""
+    import shutil
+
     if not folders_to_remove:
         return
 
@@ -161,100 +297,446 @@ def remove_unwanted_folders(root_path: str, folders_to_remove: Set[str]) -> None
             shutil.rmtree(folder_path, ignore_errors=True)
 
 
-def is_code_file(filepath: Path, extensions: Optional[Set[str]] = None) -> bool:
-    """Check if file should be included based on extension."""
-    if not extensions:
-        return True
+def looks_binary(head: bytes) -> bool:
+    """Check for a NUL byte in the start of a file, like file(1) does."""
+    return b"\x00" in head
 
-    if not filepath.suffix:
-        return True
 
-    return filepath.suffix.lower() in extensions
+def is_inside_folder(path: str, folder: str) -> bool:
+    """Check if path is folder itself or somewhere below it, following symlinks."""
+    path, folder = os.path.realpath(path), os.path.realpath(folder)
+    try:
+        return os.path.commonpath([path, folder]) == folder
+    except ValueError:
+        # Different drives on Windows
+        return False
+
+
+def iter_files(root_path: str, skip_folders: Set[str], stats: Stats) -> Iterator[os.DirEntry]:
+    """Walk the tree depth-first, pruning skipped folders before descending."""
+    stack = [root_path]
+    while stack:
+        subdirs = []
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if entry.is_symlink():
+                        continue
+                    if entry.name in skip_folders:
+                        stats.skipped_by_folder += 1
+                        continue
+                    subdirs.append(entry.path)
+                else:
+                    yield entry
+
+        # Reversed so folders are visited in listing order
+        stack.extend(reversed(subdirs))
+
+
+def iter_candidate_files(
+        start_folder: str,
+        extensions: Optional[Set[str]],
+        skip_folders: Set[str],
+        skip_files: Set[str],
+        max_file_size_mb: float,
+        stats: Stats
+) -> Iterator[os.DirEntry]:
+    """Yield the files that pass the name, extension and size filters."""
+    max_bytes = int(max_file_size_mb * 1024 * 1024)
+
+    for entry in iter_files(start_folder, skip_folders, stats):
+        name = entry.name
+        if name in skip_files:
+            stats.skipped_by_name += 1
+            continue
+
+        # Same rules as Path.suffix; files without an extension are kept
+        if extensions:
+            dot = name.rfind(".")
+            if 0 < dot < len(name) - 1 and name[dot:].lower() not in extensions:
+                stats.skipped_by_extension += 1
+                continue
 
+        # Only stat files that passed the cheap name checks. DirEntry caches
+        # the result, so this costs at most one syscall per candidate.
+        if entry.stat().st_size > max_bytes:
+            stats.skipped_by_size += 1
+            continue
 
-def is_file_too_large(file_path: Path, max_size_mb: float) -> bool:
-    """Check if file exceeds size limit."""
-    return file_path.stat().st_size > (max_size_mb * 1024 * 1024)
+        yield entry
 
 
-def read_file_content(file_path: Path) -> Optional[str]:
-    """Simple file reading with UTF-8 only."""
+def read_file_start(path: str) -> Optional[Tuple[bytes, int]]:
+    """Read a small file whole, or just enough of a large one to sniff it."""
     try:
-        return file_path.read_text(encoding='utf-8')
-    except:
+        with open(path, "rb") as in_f:
+            size = os.fstat(in_f.fileno()).st_size
+            return in_f.read(size if size < KERNEL_COPY_MIN_SIZE else SNIFF_SIZE), size
+    except OSError:
         return None
 
 
-def gather_files_into_single_text(
-        root_path: str,
-        output_file: str,
-        extensions: Optional[Set[str]] = None,
-        skip_folders: Optional[Set[str]] = None,
-        skip_files: Optional[Set[str]] = None,
-        max_file_size_mb: float = 1.0,
-        only_folder: Optional[str] = None,
-        stats: Optional[Stats] = None
-) -> None:
-    """Gather files into single text with statistics tracking."""
-    if skip_folders is None:
-        skip_folders = set()
-    if skip_files is None:
-        skip_files = set()
-    if stats is None:
-        stats = Stats()
+def read_files_sync(
+        entries: Iterable[os.DirEntry]
+) -> Iterator[Tuple[os.DirEntry, Optional[Tuple[bytes, int]]]]:
+    """Read files one by one on the calling thread."""
+    for entry in entries:
+        yield entry, read_file_start(entry.path)
 
-    root = Path(root_path)
 
-    # If only_folder is specified, create the full path
-    target_folder = root / only_folder if only_folder else None
+def read_files_in_order(
+        entries: Iterable[os.DirEntry],
+        workers: int = READ_WORKERS
+) -> Iterator[Tuple[os.DirEntry, Optional[Tuple[bytes, int]]]]:
+    """Read files on a thread pool, yielding results in walk order.
 
-    with open(output_file, "w", encoding="utf-8") as out_f:
-        for file_path in root.rglob("*"):
-            if file_path.is_dir():
-                continue
+    At most a few reads per worker are in flight so memory stays bounded.
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
-            stats.total_files += 1
-            path_str = str(file_path.relative_to(root)).replace("\\", "/")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for entry in entries:
+            pending.append((entry, pool.submit(read_file_start, entry.path)))
+            if len(pending) >= workers * 4:
+                entry, future = pending.popleft()
+                yield entry, future.result()
 
-            # Check if file is in target folder when only_folder is specified
-            if target_folder and not str(file_path).startswith(str(target_folder)):
-                stats.skipped_by_folder += 1
-                continue
+        while pending:
+            entry, future = pending.popleft()
+            yield entry, future.result()
 
-            # Rest of the checks remain the same
-            if is_file_too_large(file_path, max_file_size_mb):
-                stats.skipped_by_size += 1
-                continue
 
-            if any(part in skip_folders for part in path_str.split("/")):
-                stats.skipped_by_folder += 1
-                continue
+def _uring_read_takes_nbytes() -> bool:
+    """Check if io_uring_prep_read follows the C (sqe, fd, buf, nbytes, offset) order.
 
-            if file_path.name in skip_files:
-                stats.skipped_by_name += 1
-                continue
+    Recent liburing releases take (sqe, fd, buf, offset) and size the read
+    from the buffer instead.
+    """
+    import inspect
+
+    try:
+        params = inspect.signature(liburing.io_uring_prep_read).parameters
+    except (TypeError, ValueError):
+        return True
+    return "nbytes" in params or len(params) >= 5
 
-            if not is_code_file(file_path, extensions):
-                stats.skipped_by_extension += 1
-                continue
 
-            content = read_file_content(file_path)
-            if content is None:
-                stats.skipped_binary += 1
+def read_files_io_uring(
+        entries: Iterable[os.DirEntry],
+        queue_depth: int = IO_URING_QUEUE_DEPTH
+) -> Iterator[Tuple[os.DirEntry, Optional[Tuple[bytes, int]]]]:
+    """Read files with batched io_uring submissions, yielding results in walk order.
+
+    Falls back to the thread pool if liburing is not installed or the
+    kernel refuses to set up a ring.
+    """
+    if liburing is None:
+        yield from read_files_in_order(entries)
+        return
+
+    try:
+        ring = liburing.Ring()
+        cqe = liburing.Cqe()
+        liburing.io_uring_queue_init(queue_depth, ring)
+    except (OSError, TypeError, AttributeError):
+        yield from read_files_in_order(entries)
+        return
+
+    takes_nbytes = _uring_read_takes_nbytes()
+    entries = iter(entries)
+    # Slots are [entry, result, done] in walk order
+    pending = deque()
+    in_flight = {}
+    next_id = 0
+    exhausted = False
+    submitted = False
+    fallback_entries = None
+
+    try:
+        while True:
+            try:
+                # Queue reads until the window is full
+                while not exhausted and len(pending) < queue_depth:
+                    entry = next(entries, None)
+                    if entry is None:
+                        exhausted = True
+                        break
+
+                    slot = [entry, None, True]
+                    pending.append(slot)
+                    try:
+                        fd = os.open(entry.path, os.O_RDONLY)
+                    except OSError:
+                        continue
+
+                    size = os.fstat(fd).st_size
+                    buf = bytearray(size if size < KERNEL_COPY_MIN_SIZE else SNIFF_SIZE)
+                    if not buf:
+                        os.close(fd)
+                        slot[1] = (b"", size)
+                        continue
+
+                    in_flight[next_id] = (slot, fd, buf, size)
+                    slot[2] = False
+                    sqe = liburing.io_uring_get_sqe(ring)
+                    if takes_nbytes:
+                        liburing.io_uring_prep_read(sqe, fd, buf, len(buf), 0)
+                    else:
+                        liburing.io_uring_prep_read(sqe, fd, buf, 0)
+                    liburing.io_uring_sqe_set_data64(sqe, next_id)
+                    next_id += 1
+
+                liburing.io_uring_submit(ring)
+            except (OSError, TypeError, AttributeError):
+                if submitted:
+                    raise
+                # The binding does not work as expected, nothing was handed
+                # out yet so the thread pool can read everything instead
+                import itertools
+
+                fallback_entries = itertools.chain([slot[0] for slot in pending], entries)
+                break
+            submitted = True
+
+            while pending and pending[0][2]:
+                entry, result, _ = pending.popleft()
+                yield entry, result
+
+            if not pending:
+                if exhausted:
+                    return
                 continue
 
-            stats.included_files += 1
-            stats.total_size += len(content.encode('utf-8'))
+            # Reap whatever completed while waiting for the oldest read. One
+            # CQE at a time, as batched cqe[i] access does not wrap the ring.
+            liburing.io_uring_wait_cqe(ring, cqe)
+            while True:
+                done = cqe[0]
+                slot, fd, buf, size = in_flight.pop(done.user_data)
+                os.close(fd)
+                if done.res >= 0:
+                    slot[1] = (buf if done.res == len(buf) else buf[:done.res], size)
+                slot[2] = True
+                liburing.io_uring_cq_advance(ring, 1)
+                if not liburing.io_uring_cq_ready(ring):
+                    break
+                liburing.io_uring_wait_cqe(ring, cqe)
+    finally:
+        liburing.io_uring_queue_exit(ring)
+        for _, fd, _, _ in in_flight.values():
+            os.close(fd)
+
+    if fallback_entries is not None:
+        yield from read_files_in_order(fallback_entries)
+
+
+# Readers selectable with io_backend, all yielding (entry, result) in walk order
+IO_BACKENDS = {
+    "sync": read_files_sync,
+    "threads": read_files_in_order,
+    "uring": read_files_io_uring,
+}
+
+
+def copy_file_contents(in_f, out_f, size: int) -> None:
+    """Copy the rest of in_f into out_f, in kernel space where supported."""
+    import shutil
+
+    offset = in_f.tell()
+    if size - offset >= KERNEL_COPY_MIN_SIZE and hasattr(os, "sendfile"):
+        # Kernel writes go to the fd directly, so drain buffered output first
+        out_f.flush()
+        in_fd, out_fd = in_f.fileno(), out_f.fileno()
+        try:
+            while True:
+                sent = os.sendfile(out_fd, in_fd, offset, COPY_BUFFER_SIZE)
+                if sent == 0:
+                    return
+                offset += sent
+        except OSError:
+            # Not supported for regular files here (e.g. macOS), copy the rest
+            in_f.seek(offset)
+
+    shutil.copyfileobj(in_f, out_f, COPY_BUFFER_SIZE)
+
+
+@functools.lru_cache(maxsize=None)
+def _output_file_mode() -> int:
+    """Permissions a plain open() would give the output, honoring the umask."""
+    # The umask can only be read by setting it, do so before any threads start
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def open_output_file(output_file: str) -> Tuple[BinaryIO, Optional[str]]:
+    """Open a temporary file next to output_file to write into.
+
+    Uses an anonymous O_TMPFILE file on Linux, so nothing is left behind if
+    the run dies, and a hidden named temp file elsewhere. Returns the file
+    and the temp path, which is None for anonymous files.
+    """
+    directory = os.path.dirname(os.path.abspath(output_file))
+    if hasattr(os, "O_TMPFILE") and os.path.isdir("/proc/self/fd"):
+        try:
+            fd = os.open(directory, os.O_TMPFILE | os.O_RDWR, _output_file_mode())
+            return os.fdopen(fd, "wb", buffering=OUTPUT_BUFFER_SIZE), None
+        except OSError:
+            # Filesystem or kernel without O_TMPFILE support
+            pass
+
+    import tempfile
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    os.chmod(temp_path, _output_file_mode())
+    return os.fdopen(fd, "wb", buffering=OUTPUT_BUFFER_SIZE), temp_path
+
+
+def finish_output_file(out_f: BinaryIO, output_file: str, temp_path: Optional[str]) -> str:
+    """Sync the finished output once and return a temp path to rename into place."""
+    out_f.flush()
+    fd = out_f.fileno()
+    if hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
 
-            relative_path = file_path.relative_to(root)
-            out_f.write(f"\n{'=' * 60}\n")
-            out_f.write(f"FILE: {relative_path}\n")
-            out_f.write(f"{'=' * 60}\n")
-            out_f.write(content)
-            out_f.write("\n")
+    # The output is not read back, so drop it from the page cache
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
 
+    if temp_path is not None:
+        return temp_path
+
+    # Give the anonymous file a name so it can be renamed over the target.
+    # This is the last step, so no later error can leave the name behind.
+    temp_path = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        os.link(f"/proc/self/fd/{fd}", temp_path, follow_symlinks=True)
+        return temp_path
+    except OSError:
+        pass
+
+    # Some sandboxes refuse to link /proc fds, copy it out instead
+    import tempfile
+
+    temp_fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(temp_path), prefix=".", suffix=".tmp"
+    )
+    try:
+        os.fchmod(temp_fd, _output_file_mode())
+        offset, size = 0, os.fstat(fd).st_size
+        while offset < size:
+            offset += os.sendfile(temp_fd, fd, offset, size - offset)
+        os.fdatasync(temp_fd)
+    except BaseException:
+        os.close(temp_fd)
+        os.remove(temp_path)
+        raise
+    os.close(temp_fd)
+    return temp_path
+
+
+def gather_files_into_single_text(
+        root_path: str,
+        output_file: str,
+        extensions: Optional[Set[str]] = None,
+        skip_folders: Optional[Set[str]] = None,
+        skip_files: Optional[Set[str]] = None,
+        max_file_size_mb: float = 1.0,
+        only_folder: Optional[str] = None,
+        stats: Optional[Stats] = None,
+        io_backend: str = "threads"
+) -> None:
+    """Gather files into single text with statistics tracking."""
+    if io_backend not in IO_BACKENDS:
+        raise ValueError(f"Unknown io_backend '{io_backend}', expected one of {sorted(IO_BACKENDS)}")
+    # Pick the reader once instead of branching per file
+    read_files = IO_BACKENDS[io_backend]
+
+    # Normalize filters once so the per-file checks are plain set lookups
+    extensions = frozenset(ext.lower() for ext in extensions) if extensions else None
+    skip_folders = frozenset(folder.strip("/") for folder in skip_folders or ())
+    skip_files = frozenset(skip_files or ())
+    if stats is None:
+        stats = Stats()
+
+    # Paths from the walk all start with the root, so slice it off
+    root_path = os.path.normpath(root_path)
+    root_prefix_len = len(os.path.join(root_path, ""))
+
+    # If only_folder is specified, only walk that part of the tree
+    start_folder = os.path.normpath(os.path.join(root_path, only_folder)) if only_folder else root_path
+    if not is_inside_folder(start_folder, root_path):
+        print(f"[WARN] Folder '{only_folder}' is outside the repository, ignoring it.")
+        candidates = ()
+    elif not os.path.isdir(start_folder):
+        print(f"[WARN] Folder '{only_folder}' not found in repository.")
+        candidates = ()
+    else:
+        candidates = iter_candidate_files(
+            start_folder, extensions, skip_folders, skip_files, max_file_size_mb, stats
+        )
+
+    # Written to a temp file and renamed at the end, so the output is never partial
+    batch = bytearray()
+    out_f, temp_path = open_output_file(output_file)
+    try:
+        with out_f:
+            # Reads may run ahead (io_uring or worker threads), writes stay sequential and ordered
+            for entry, result in read_files(candidates):
+                if result is None:
+                    stats.skipped_binary += 1
+                    continue
+
+                data, size = result
+                if looks_binary(data[:SNIFF_SIZE]):
+                    stats.skipped_binary += 1
+                    continue
+
+                stats.included_files += 1
+                stats.total_size += size
+
+                relative_path = entry.path[root_prefix_len:]
+                if os.sep != "/":
+                    relative_path = relative_path.replace(os.sep, "/")
+                batch += FILE_HEADER_START
+                batch += os.fsencode(relative_path)
+                batch += FILE_HEADER_END
+                batch += data
+
+                # Large files were only sniffed, stream the remainder
+                if len(data) < size:
+                    out_f.write(batch)
+                    batch.clear()
+                    with open(entry.path, "rb") as in_f:
+                        in_f.seek(len(data))
+                        copy_file_contents(in_f, out_f, size)
+
+                batch += b"\n"
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    out_f.write(batch)
+                    batch.clear()
+
+            out_f.write(batch)
+            temp_path = finish_output_file(out_f, output_file, temp_path)
+
+        os.replace(temp_path, output_file)
+    except BaseException:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def parse_args(argv: List[str]):
+    """Parse command line arguments, without argparse for a bare URL."""
+    # A bare `download.py <url>` needs no parsing, so skip building the parser
+    if len(argv) == 1 and "://" in argv[0]:
+        return SimpleNamespace(repo_url=argv[0], **DEFAULT_ARGS)
+
+    import argparse
 
-def main():
     parser = argparse.ArgumentParser(
         description="Clone a GitHub repo and merge all files into one text file based on configuration."
     )
@@ -262,26 +744,28 @@ def main():
     parser.add_argument(
         "--config",
         "-c",
-        default="config.json",
-        help="Path to the configuration file. Defaults to 'config.json'."
+        help=f"Path to the configuration file. Defaults to '{DEFAULT_ARGS['config']}'."
     )
     parser.add_argument(
         "--branch",
         "-b",
-        default=None,
         help="Which branch to clone. Overrides config if specified."
     )
+    parser.add_argument(
+        "--depth",
+        "-d",
+        type=int,
+        help=f"Clone history depth. Defaults to {DEFAULT_ARGS['depth']} (latest commit only), 0 for full history."
+    )
     parser.add_argument(
         "--output",
         "-o",
-        default=None,
         help="Name of the output file. If not provided, derived from the repo name."
     )
     parser.add_argument(
         "--exclude",
         "-e",
         nargs="*",
-        default=[],
         help="Additional folders to exclude (added to skip_folders from config)"
     )
     parser.add_argument(
@@ -292,7 +776,7 @@ def main():
     parser.add_argument(
         "--stats",
         action="store_true",
-        help="Show processing statistics"
+        help="Show processing statistics (files filtered out during the sparse clone are not counted)"
     )
     parser.add_argument(
         "--include-binary",
@@ -304,8 +788,21 @@ def main():
         "-i",
         help="Only include files from this folder path (relative to repo root)"
     )
+    parser.add_argument(
+        "--io-backend",
+        choices=sorted(IO_BACKENDS),
+        help="How files are read: 'threads', 'sync' or the experimental 'uring' "
+             f"(io_uring, falls back to threads). Defaults to '{DEFAULT_ARGS['io_backend']}'."
+    )
+    parser.set_defaults(**DEFAULT_ARGS)
+
+    return parser.parse_args(argv)
 
-    args = parser.parse_args()
+
+def main():
+    args = parse_args(sys.argv[1:])
+
+    import shutil
 
     # Load configuration
     config = load_config(args.config)
@@ -331,14 +828,15 @@ def main():
         shutil.rmtree(temp_folder, ignore_errors=True)
     os.makedirs(temp_folder, exist_ok=True)
 
-    # Clone repository
-    clone_repo(args.repo_url, temp_folder, branch)
-
     # Convert lists to sets for better performance
     extensions = set(ext.lower() for ext in config["extensions"]) if config["extensions"] else None
     skip_folders = set(config["skip_folders"] + args.exclude)
     skip_files = set(config["skip_files"])
 
+    # Clone repository, checking out only files that pass the filters
+    sparse_patterns = build_sparse_patterns(extensions, skip_folders, skip_files)
+    clone_repo(args.repo_url, temp_folder, branch, args.depth, sparse_patterns)
+
     # Get max file size (command line overrides config)
     max_file_size = args.max_file_size if args.max_file_size is not None else config["max_file_size_mb"]
 
@@ -354,7 +852,8 @@ def main():
         skip_files=skip_files,
         max_file_size_mb=max_file_size,
         only_folder=args.only,
-        stats=stats
+        stats=stats,
+        io_backend=args.io_backend
     )
 
     if stats:
@@ -0,0 +1,306 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from collections import deque
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import download
+
+
+class FakeLiburing:
+    """Minimal stand-in for the liburing binding that reads on submit.
+
+    Completions are delivered in reverse submission order to exercise the
+    in-order hand-off to the writer.
+    """
+
+    def __init__(self, c_signature=True):
+        if c_signature:
+            self.io_uring_prep_read = self._prep_read_c
+        else:
+            self.io_uring_prep_read = self._prep_read_offset
+        self.completions = deque()
+
+    class Ring:
+        pass
+
+    class Cqe:
+        def __init__(self):
+            self.owner = None
+
+        def __getitem__(self, index):
+            return self.owner.completions[index]
+
+    def io_uring_queue_init(self, depth, ring):
+        ring.queued = []
+
+    def io_uring_queue_exit(self, ring):
+        pass
+
+    def io_uring_get_sqe(self, ring):
+        sqe = SimpleNamespace(user_data=None)
+        ring.queued.append(sqe)
+        return sqe
+
+    def _prep_read_c(self, sqe, fd, buf, nbytes, offset):
+        sqe.fd, sqe.buf, sqe.nbytes, sqe.offset = fd, buf, nbytes, offset
+
+    def _prep_read_offset(self, sqe, fd, buf, offset=None):
+        sqe.fd, sqe.buf, sqe.nbytes, sqe.offset = fd, buf, len(buf), offset or 0
+
+    def io_uring_sqe_set_data64(self, sqe, data):
+        sqe.user_data = data
+
+    def io_uring_submit(self, ring):
+        for sqe in reversed(ring.queued):
+            data = os.pread(sqe.fd, sqe.nbytes, sqe.offset)
+            sqe.buf[:len(data)] = data
+            self.completions.append(SimpleNamespace(res=len(data), user_data=sqe.user_data))
+        submitted, ring.queued = len(ring.queued), []
+        return submitted
+
+    def io_uring_wait_cqe(self, ring, cqe):
+        assert self.completions, "waiting with nothing in flight"
+        cqe.owner = self
+
+    def io_uring_cq_ready(self, ring):
+        return len(self.completions)
+
+    def io_uring_cq_advance(self, ring, count):
+        for _ in range(count):
+            self.completions.popleft()
+
+
+class GatherBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "repo")
+        files = {
+            "a.py": b"print('a')\n",
+            "empty.py": b"",
+            "src/b.py": b"b" * 100,
+            "src/big.py": b"x" * (download.KERNEL_COPY_MIN_SIZE + 1000),
+            "src/bin.py": b"bin\x00ary",
+            "node_modules/c.js": b"skip",
+        }
+        for i in range(300):
+            files[f"many/f{i}.py"] = str(i).encode() * (i % 50)
+        for name, content in files.items():
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def gather(self, io_backend):
+        output_file = os.path.join(self.tmp.name, f"{io_backend}.txt")
+        stats = download.Stats()
+        download.gather_files_into_single_text(
+            self.root, output_file, {".py"}, {"node_modules"},
+            stats=stats, io_backend=io_backend
+        )
+        with open(output_file, "rb") as f:
+            return f.read(), stats
+
+    def assert_matches_sync(self, io_backend):
+        expected, expected_stats = self.gather("sync")
+        output, stats = self.gather(io_backend)
+        self.assertEqual(output, expected)
+        self.assertEqual(stats.included_files, expected_stats.included_files)
+        self.assertEqual(stats.skipped_binary, expected_stats.skipped_binary)
+
+    def test_sync_output(self):
+        output, stats = self.gather("sync")
+        self.assertIn(b"FILE: src/big.py\n", output)
+        self.assertNotIn(b"bin\x00ary", output)
+        self.assertNotIn(b"node_modules", output)
+        self.assertEqual(stats.skipped_binary, 1)
+
+    def test_threads_matches_sync(self):
+        self.assert_matches_sync("threads")
+
+    def assert_uring_matches_sync(self, fake):
+        # The thread pool must not be used, or a broken ring would go unnoticed
+        no_fallback = mock.patch.object(
+            download, "read_files_in_order", side_effect=AssertionError("fell back to threads")
+        )
+        with mock.patch.object(download, "liburing", fake), no_fallback:
+            self.assert_matches_sync("uring")
+
+    def test_uring_c_signature_matches_sync(self):
+        self.assert_uring_matches_sync(FakeLiburing(c_signature=True))
+
+    def test_uring_offset_signature_matches_sync(self):
+        self.assert_uring_matches_sync(FakeLiburing(c_signature=False))
+
+    def test_uring_falls_back_when_binding_misbehaves(self):
+        fake = FakeLiburing()
+        fake.io_uring_prep_read = mock.Mock(side_effect=TypeError("bad signature"))
+        with mock.patch.object(download, "liburing", fake):
+            self.assert_matches_sync("uring")
+
+    def test_uring_without_liburing_uses_threads(self):
+        with mock.patch.object(download, "liburing", None):
+            self.assert_matches_sync("uring")
+
+
+class OnlyFolderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "repo")
+        for name in ("src/a.py", "other/b.py", "outside.py"):
+            path = os.path.join(self.root if name != "outside.py" else self.tmp.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def gather(self, only_folder):
+        output_file = os.path.join(self.tmp.name, "out.txt")
+        download.gather_files_into_single_text(self.root, output_file, only_folder=only_folder)
+        with open(output_file, "rb") as f:
+            return f.read()
+
+    def test_relative_folder_headers(self):
+        for only_folder in ("src", "./src", "src/", "other/../src"):
+            output = self.gather(only_folder)
+            self.assertIn(b"FILE: src/a.py\n", output, only_folder)
+            self.assertNotIn(b"other/b.py", output, only_folder)
+
+    def test_folders_outside_repo_are_ignored(self):
+        for only_folder in ("..", self.tmp.name, "../repo2"):
+            self.assertEqual(self.gather(only_folder), b"", only_folder)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "needs symlinks")
+    def test_symlinked_folder_outside_repo_is_ignored(self):
+        secret = os.path.join(self.tmp.name, "secret")
+        os.makedirs(secret)
+        with open(os.path.join(secret, "key.py"), "w") as f:
+            f.write("secret")
+        os.symlink(os.path.join("..", "secret"), os.path.join(self.root, "docs"))
+        os.symlink(secret, os.path.join(self.root, "abs"))
+
+        for only_folder in ("docs", "abs", "docs/"):
+            self.assertEqual(self.gather(only_folder), b"", only_folder)
+
+
+class OutputFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "repo")
+        self.out_dir = os.path.join(self.tmp.name, "out")
+        os.makedirs(self.root)
+        os.makedirs(self.out_dir)
+        with open(os.path.join(self.root, "a.py"), "w") as f:
+            f.write("a")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_output_is_written(self):
+        output_file = os.path.join(self.out_dir, "out.txt")
+        download.gather_files_into_single_text(self.root, output_file)
+        self.assertEqual(os.listdir(self.out_dir), ["out.txt"])
+
+    @unittest.skipIf(os.name == "nt", "POSIX permissions only")
+    def test_output_mode_follows_umask(self):
+        o_tmpfile = getattr(os, "O_TMPFILE", None)
+        for use_tmpfile in (True, False):
+            output_file = os.path.join(self.out_dir, f"out_{use_tmpfile}.txt")
+            old_umask = os.umask(0o077)
+            download._output_file_mode.cache_clear()
+            if not use_tmpfile and o_tmpfile is not None:
+                del os.O_TMPFILE
+            try:
+                download.gather_files_into_single_text(self.root, output_file)
+            finally:
+                if o_tmpfile is not None:
+                    os.O_TMPFILE = o_tmpfile
+                os.umask(old_umask)
+                download._output_file_mode.cache_clear()
+            self.assertEqual(os.stat(output_file).st_mode & 0o777, 0o600, use_tmpfile)
+
+    @unittest.skipUnless(hasattr(os, "O_TMPFILE"), "needs O_TMPFILE")
+    def test_failed_copy_fallback_leaves_no_temp_file(self):
+        output_file = os.path.join(self.out_dir, "out.txt")
+        with mock.patch.object(download.os, "link", side_effect=OSError), \
+                mock.patch.object(download.os, "sendfile", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                download.gather_files_into_single_text(self.root, output_file)
+        self.assertEqual(os.listdir(self.out_dir), [])
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class SparseCheckoutTest(unittest.TestCase):
+    extensions = {".py", ".md"}
+    skip_folders = {"no*de", "a/b", ".git"}
+    skip_files = {"*.py", "[x]", "#h", "!n"}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "source")
+        names = [
+            "x.py", ".x.", ".y.py", "a/foo.", "a/*.py", "a/[x]", "a/x", "a/READ.ME",
+            "a/UP.PY", "a/#h", "a/!n", "a/b/c.py", "no*de/q.py", "node/q.py", "[x]dir/k.py",
+        ]
+        for name in names:
+            path = os.path.join(self.source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(name)
+
+        git = ["git", "-C", self.source, "-c", "user.name=test", "-c", "user.email=test@example.com"]
+        subprocess.check_call(["git", "init", "-q", "-b", "main", self.source])
+        subprocess.check_call(git + ["add", "-A"])
+        subprocess.check_call(git + ["commit", "-q", "-m", "init"])
+        subprocess.check_call(git + ["config", "uploadpack.allowFilter", "true"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def gather(self, root_path):
+        output_file = root_path + ".txt"
+        download.gather_files_into_single_text(
+            root_path, output_file, self.extensions, self.skip_folders, self.skip_files
+        )
+        with open(output_file, "rb") as f:
+            return f.read()
+
+    def test_sparse_clone_keeps_everything_the_walk_keeps(self):
+        url = "file://" + self.source
+        full, sparse = os.path.join(self.tmp.name, "full"), os.path.join(self.tmp.name, "sparse")
+        subprocess.check_call(["git", "clone", "-q", url, full])
+
+        patterns = download.build_sparse_patterns(
+            self.extensions, self.skip_folders, self.skip_files
+        )
+        with mock.patch.object(download, "validate_repo_url", return_value=True), \
+                mock.patch("sys.stdout"):
+            download.clone_repo(url, sparse, "main", 1, patterns)
+
+        expected = self.gather(full)
+        self.assertIn(b"FILE: a/foo.\n", expected)
+        self.assertEqual(self.gather(sparse), expected)
+
+
+class ParseArgsTest(unittest.TestCase):
+    def test_bare_url_matches_argparse_defaults(self):
+        url = "https://github.com/user/repo"
+        fast = download.parse_args([url])
+        # Repeating a default option forces the argparse path
+        parsed = download.parse_args([url, "--config", download.DEFAULT_ARGS["config"]])
+        self.assertEqual(vars(fast), vars(parsed))
+
+
+if __name__ == "__main__":
+    unittest.main()